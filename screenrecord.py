@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import argparse
 import os
 import re
 import subprocess
@@ -11,6 +12,10 @@ from PIL import Image, ImageTk
 import threading
 import signal
 import sys
+from tracing import Tracer
+
+# Global tracer; enabled from the command line in main().
+TRACER = Tracer()
 
 def get_monitor_geometry(monitor_name):
     """
@@ -19,7 +24,8 @@ def get_monitor_geometry(monitor_name):
     offset is in the form "+X+Y". Returns (None, None) if not found.
     """
     try:
-        output = subprocess.check_output(["xrandr", "--query"], universal_newlines=True)
+        with TRACER.span("xrandr.query", "recording", cat="subprocess", monitor=monitor_name):
+            output = subprocess.check_output(["xrandr", "--query"], universal_newlines=True)
         for line in output.splitlines():
             if " connected" in line and monitor_name.lower() in line.lower():
                 m = re.search(r'(\d+x\d+\+\d+\+\d+)', line)
@@ -76,6 +82,8 @@ class ScreenRecorder:
         self.segments = []                # List of segment file paths
         self.current_segment_proc = None  # ffmpeg process for current segment
         self.current_segment_file = None  # Filename for current segment
+        self.current_segment_started = None  # perf_counter() time the segment's ffmpeg was spawned
+        self.session_started = None       # perf_counter() time the session started (for tracing)
 
         # Fixed default audio device order.
         self.audio_devices = ['hw:0,7', 'hw:0,6']
@@ -98,40 +106,51 @@ class ScreenRecorder:
     def toggle_recording(self):
         if not self.is_recording:
             # Start a new recording session.
-            self.segments = []
-            self.paused = False
-            self.start_time = time.time()
-            self.set_status("Recording")
-            self.record_btn.config(text="Stop Recording")
-            self.pause_btn.config(text="Pause Recording", state="normal")
-            self._start_segment()
-            self.is_recording = True
+            self.session_started = TRACER.now()
+            TRACER.begin("recording")
+            with TRACER.span("recording.start", "recording"):
+                self.segments = []
+                self.paused = False
+                self.start_time = time.time()
+                self.set_status("Recording")
+                self.record_btn.config(text="Stop Recording")
+                self.pause_btn.config(text="Pause Recording", state="normal")
+                self._start_segment()
+                self.is_recording = True
         else:
-            # Stop current segment if running.
-            if self.current_segment_proc:
-                self._stop_current_segment()
-            self.is_recording = False
-            self.set_status("Stopped")
-            self.record_btn.config(text="Start Recording")
-            self.pause_btn.config(text="Pause Recording", state="disabled")
-            self._combine_segments()
+            with TRACER.span("recording.stop", "recording"):
+                # Stop current segment if running.
+                if self.current_segment_proc:
+                    self._stop_current_segment()
+                self.is_recording = False
+                self.set_status("Stopped")
+                self.record_btn.config(text="Start Recording")
+                self.pause_btn.config(text="Pause Recording", state="disabled")
+            try:
+                self._combine_segments()
+            finally:
+                TRACER.add_complete("recording.session", "recording", self.session_started, TRACER.now(),
+                                    args={"segments": len(self.segments)})
+                TRACER.dump("recording")
 
     def toggle_pause(self):
         if not self.is_recording:
             return
         if not self.paused:
-            # Pause: stop the current segment.
-            if self.current_segment_proc:
-                self._stop_current_segment()
-            self.paused = True
-            self.pause_btn.config(text="Resume Recording")
-            self.set_status("Paused")
+            with TRACER.span("recording.pause", "recording"):
+                # Pause: stop the current segment.
+                if self.current_segment_proc:
+                    self._stop_current_segment()
+                self.paused = True
+                self.pause_btn.config(text="Resume Recording")
+                self.set_status("Paused")
         else:
-            # Resume: start a new segment.
-            self._start_segment()
-            self.paused = False
-            self.pause_btn.config(text="Pause Recording")
-            self.set_status("Recording")
+            with TRACER.span("recording.resume", "recording"):
+                # Resume: start a new segment.
+                self._start_segment()
+                self.paused = False
+                self.pause_btn.config(text="Pause Recording")
+                self.set_status("Recording")
 
     def _start_segment(self):
         """
@@ -214,19 +233,30 @@ class ScreenRecorder:
             '-ac', '2',      # Force stereo audio
             seg_filename
         ]
-        self.current_segment_proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.current_segment_started = TRACER.now()
+        with TRACER.span("ffmpeg.spawn", "recording", cat="subprocess", segment=seg_index):
+            self.current_segment_proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
     def _stop_current_segment(self):
         """
         Stops the current ffmpeg process (if any) and adds its file to the segments list.
         """
         if self.current_segment_proc:
-            self.current_segment_proc.terminate()
-            try:
-                # self.current_segment_proc.wait(timeout=5)
-                self.current_segment_proc.communicate(input=b"q", timeout=5)
-            except subprocess.TimeoutExpired:
-                self.current_segment_proc.kill()
+            with TRACER.span("ffmpeg.stop", "recording", cat="subprocess") as span:
+                self.current_segment_proc.terminate()
+                try:
+                    # self.current_segment_proc.wait(timeout=5)
+                    self.current_segment_proc.communicate(input=b"q", timeout=5)
+                except subprocess.TimeoutExpired:
+                    self.current_segment_proc.kill()
+                    self.current_segment_proc.wait()
+                    span.set("killed", True)
+            # Whole lifetime of the segment's ffmpeg process, from spawn to exit. It overlaps the
+            # start/pause/resume/stop spans, so it goes on its own async track.
+            TRACER.add_async("ffmpeg.segment", "recording", self.current_segment_started, TRACER.now(),
+                             len(self.segments) + 1, "subprocess",
+                             {"file": self.current_segment_file,
+                              "returncode": self.current_segment_proc.returncode})
             self.segments.append(self.current_segment_file)
             self.current_segment_proc = None
             self.current_segment_file = None
@@ -243,15 +273,18 @@ class ScreenRecorder:
         with open(list_filename, "w") as f:
             for seg in self.segments:
                 f.write(f"file '{seg}'\n")
-        file_name = simpledialog.askstring("Save Recording",
-                                             "Enter file name (leave blank for default):",
-                                             parent=self.root)
+        with TRACER.span("ui.ask_filename", "recording", cat="ui"):
+            file_name = simpledialog.askstring("Save Recording",
+                                                 "Enter file name (leave blank for default):",
+                                                 parent=self.root)
         if not file_name:
             existing = [f for f in os.listdir(self.output_dir) if f.startswith("screenrecording") and f.endswith(".mp4")]
             file_name = f"screenrecording{len(existing)+1}.mp4"
         else:
             file_name += ".mp4"
         final_file = os.path.join(self.output_dir, file_name)
+        # Everything after the save dialog: concat encode, cleanup and probe.
+        finalize_started = TRACER.now()
         cmd = [
             'ffmpeg',
             '-fflags', '+genpts',           # Generate new PTS for all frames
@@ -269,14 +302,17 @@ class ScreenRecorder:
             final_file
         ]
 
-        subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        for seg in self.segments:
-            if os.path.exists(seg):
-                os.remove(seg)
-        os.remove(list_filename)
+        with TRACER.span("ffmpeg.concat", "recording", cat="subprocess", segments=len(self.segments)):
+            subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        with TRACER.span("segments.cleanup", "recording"):
+            for seg in self.segments:
+                if os.path.exists(seg):
+                    os.remove(seg)
+            os.remove(list_filename)
         self.set_status(f"Saved as {file_name}")
         try:
-            probe = ffmpeg.probe(final_file)
+            with TRACER.span("ffmpeg.probe", "recording", cat="subprocess"):
+                probe = ffmpeg.probe(final_file)
             video_info = next(stream for stream in probe['streams'] if stream['codec_type'] == 'video')
             audio_info = next(stream for stream in probe['streams'] if stream['codec_type'] == 'audio')
             duration = float(probe['format']['duration'])
@@ -289,6 +325,7 @@ class ScreenRecorder:
             self.audio_codec_label.config(text=f"Audio Codec: {audio_codec}")
         except Exception as e:
             print(f"Error displaying final info: {e}")
+        TRACER.add_complete("recording.finalize", "recording", finalize_started, TRACER.now())
 
     def set_status(self, text):
         self.status_label.config(text=f"Status: {text}")
@@ -323,8 +360,11 @@ class CameraRecorder:
 
     def start_camera(self):
         if messagebox.askyesno("Start Camera", "Turn on the camera?", parent=self.root):
-            self.cap = cv2.VideoCapture(0)
+            TRACER.begin("camera")
+            with TRACER.span("camera.open", "camera", cat="camera"):
+                self.cap = cv2.VideoCapture(0)
             if not self.cap.isOpened():
+                TRACER.dump("camera")
                 messagebox.showerror("Camera Error", "Unable to access the camera.", parent=self.root)
                 return
             self.camera_on = True
@@ -335,24 +375,30 @@ class CameraRecorder:
     def stop_camera(self):
         if self.cap:
             self.camera_on = False
-            self.cap.release()
+            with TRACER.span("camera.release", "camera", cat="camera"):
+                self.cap.release()
             self.camera_btn.config(text="Start Camera")
             self.camera_frame.pack_forget()
             self.resized = False
+            TRACER.dump("camera")
 
     def update_camera(self):
         if self.camera_on:
-            ret, frame = self.cap.read()
-            if ret:
-                cv2image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                img = Image.fromarray(cv2image)
-                imgtk = ImageTk.PhotoImage(image=img)
-                self.camera_frame.imgtk = imgtk
-                self.camera_frame.config(image=imgtk)
-                if not self.resized:
-                    new_size = 320
-                    self.root.geometry(f"{new_size+400}x{new_size+150}")
-                    self.resized = True
+            with TRACER.span("camera.frame", "camera", cat="camera"):
+                with TRACER.span("camera.read", "camera", cat="camera", aggregate_only=True):
+                    ret, frame = self.cap.read()
+                if ret:
+                    with TRACER.span("camera.convert", "camera", cat="camera", aggregate_only=True):
+                        cv2image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                        img = Image.fromarray(cv2image)
+                        imgtk = ImageTk.PhotoImage(image=img)
+                    with TRACER.span("camera.display", "camera", cat="camera", aggregate_only=True):
+                        self.camera_frame.imgtk = imgtk
+                        self.camera_frame.config(image=imgtk)
+                    if not self.resized:
+                        new_size = 320
+                        self.root.geometry(f"{new_size+400}x{new_size+150}")
+                        self.resized = True
             self.root.after(10, self.update_camera)
 
 def quit_app(event=None, screen_recorder=None, camera_recorder=None, root=None):
@@ -360,9 +406,20 @@ def quit_app(event=None, screen_recorder=None, camera_recorder=None, root=None):
         if screen_recorder.is_recording or camera_recorder.camera_on:
             if not messagebox.askyesno("Quit", "Recording or camera is active. Quit anyway?", parent=root):
                 return
+    # Sessions still open here are cut short; keep their traces anyway.
+    TRACER.dump("recording", incomplete=True)
+    TRACER.dump("camera", incomplete=True)
     root.destroy()
 
 def main():
+    parser = argparse.ArgumentParser(description="Screen and camera recorder")
+    parser.add_argument("--trace", action="store_true",
+                        help="Write a Chrome/Perfetto trace file of recorder phases after each session")
+    parser.add_argument("--trace-dir", default=None,
+                        help="Directory for trace files (default: the recordings directory)")
+    args = parser.parse_args()
+    TRACER.enabled = args.trace
+
     root = tk.Tk()
     root.title("Screen Recorder")
     root.geometry("600x400")
@@ -445,6 +502,7 @@ def main():
     camera_recorder = CameraRecorder(root, cam_btn, cam_feed_frame)
     screen_recorder.source_var = source_var
     screen_recorder.quality_var = quality_var
+    TRACER.output_dir = args.trace_dir or screen_recorder.output_dir
 
     record_btn.config(command=screen_recorder.toggle_recording)
     pause_btn.config(command=screen_recorder.toggle_pause)
@@ -0,0 +1,132 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tracing import Tracer
+
+
+def load_events(trace_file):
+    with open(trace_file) as f:
+        return [e for e in json.load(f)["traceEvents"] if e["ph"] != "M"]
+
+
+def test_disabled_span_is_shared_and_records_nothing(tmp_path):
+    tracer = Tracer(output_dir=str(tmp_path))
+    tracer.begin("recording")
+    span = tracer.span("recording.stop", "recording")
+    assert span is tracer.span("ffmpeg.stop", "recording", cat="subprocess")
+    with span as s:
+        s.set("killed", True)
+    tracer.add_complete("recording.finalize", "recording", 1.0, 2.0)
+    tracer.add_async("ffmpeg.segment", "recording", 1.0, 2.0, 1)
+    assert tracer.stats("recording") == {}
+    assert tracer.dump("recording") is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_events_are_complete_events_in_microseconds(tmp_path):
+    tracer = Tracer(enabled=True, output_dir=str(tmp_path))
+    tracer.begin("recording")
+    tracer.add_complete("ffmpeg.concat", "recording", 1.5, 1.75, "subprocess", {"segments": 2})
+    with tracer.span("ffmpeg.stop", "recording", cat="subprocess") as span:
+        span.set("killed", True)
+
+    events = load_events(tracer.dump("recording"))
+    assert [e["ph"] for e in events] == ["X", "X"]
+    assert events[0]["ts"] == pytest.approx(1.5e6)
+    assert events[0]["dur"] == pytest.approx(0.25e6)
+    assert events[0]["args"] == {"segments": 2}
+    assert events[1]["args"] == {"killed": True}
+
+
+def test_complete_events_nest_after_start_pause_resume_stop(tmp_path):
+    # Mirrors how ScreenRecorder wraps its phases and segment lifetimes.
+    tracer = Tracer(enabled=True, output_dir=str(tmp_path))
+    session_started = tracer.now()
+    tracer.begin("recording")
+    segments = 0
+    segment_started = None
+    for phase in ("recording.start", "recording.pause", "recording.resume", "recording.stop"):
+        with tracer.span(phase, "recording"):
+            if phase in ("recording.start", "recording.resume"):
+                segment_started = tracer.now()
+                with tracer.span("ffmpeg.spawn", "recording", cat="subprocess"):
+                    pass
+            else:
+                with tracer.span("ffmpeg.stop", "recording", cat="subprocess"):
+                    pass
+                segments += 1
+                tracer.add_async("ffmpeg.segment", "recording", segment_started, tracer.now(),
+                                 segments, "subprocess")
+    tracer.add_complete("recording.finalize", "recording", tracer.now(), tracer.now())
+    tracer.add_complete("recording.session", "recording", session_started, tracer.now())
+
+    events = load_events(tracer.dump("recording"))
+    by_tid = {}
+    for event in events:
+        if event["ph"] == "X":
+            by_tid.setdefault(event["tid"], []).append(event)
+    for slices in by_tid.values():
+        slices.sort(key=lambda e: (e["ts"], -e["dur"]))
+        stack = []
+        for event in slices:
+            end = event["ts"] + event["dur"]
+            while stack and stack[-1] <= event["ts"]:
+                stack.pop()
+            assert not stack or end <= stack[-1], f"{event['name']} overlaps its parent"
+            stack.append(end)
+
+    async_events = [e for e in events if e["ph"] in ("b", "e")]
+    assert [(e["ph"], e["id"]) for e in async_events] == [("b", 1), ("e", 1), ("b", 2), ("e", 2)]
+    assert all(e["name"] == "ffmpeg.segment" for e in async_events)
+
+
+def test_summary_stats_are_correct_and_sessions_stay_separate(tmp_path, capsys):
+    tracer = Tracer(enabled=True, output_dir=str(tmp_path))
+    tracer.begin("recording")
+    tracer.begin("camera")
+    tracer.add_complete("ffmpeg.stop", "recording", 0.0, 0.010)
+    tracer.add_complete("ffmpeg.stop", "recording", 0.0, 0.030)
+    tracer.add_complete("camera.frame", "camera", 0.0, 0.005)
+    tracer.add_complete("camera.read", "camera", 0.0, 0.002, aggregate_only=True)
+    tracer.add_complete("camera.open", "unstarted", 0.0, 1.0)
+
+    stats = tracer.stats("recording")
+    assert stats["ffmpeg.stop"] == (2, pytest.approx(40.0), pytest.approx(30.0))
+    assert "camera.frame" not in stats
+    assert tracer.stats("unstarted") == {}
+
+    recording_file = tracer.dump("recording")
+    summary = capsys.readouterr().out.split("Phase", 1)[1]
+    assert "ffmpeg.stop" in summary and "camera" not in summary
+
+    camera_file = tracer.dump("camera")
+    assert camera_file != recording_file
+    assert [e["name"] for e in load_events(camera_file)] == ["camera.frame"]
+    assert "camera.read" in capsys.readouterr().out
+
+
+def test_event_cap_is_per_name(tmp_path, monkeypatch):
+    monkeypatch.setattr(Tracer, "MAX_EVENTS_PER_NAME", 3)
+    tracer = Tracer(enabled=True, output_dir=str(tmp_path))
+    tracer.begin("camera")
+    for i in range(10):
+        tracer.add_complete("camera.frame", "camera", i, i + 0.5)
+    tracer.add_complete("camera.release", "camera", 20.0, 20.1)
+
+    assert tracer.stats("camera")["camera.frame"][0] == 10
+    names = [e["name"] for e in load_events(tracer.dump("camera"))]
+    assert names.count("camera.frame") == 3
+    assert "camera.release" in names
+
+
+def test_incomplete_dump_is_labelled(tmp_path):
+    tracer = Tracer(enabled=True, output_dir=str(tmp_path))
+    tracer.begin("recording")
+    tracer.add_complete("recording.start", "recording", 0.0, 0.1)
+    trace_file = tracer.dump("recording", incomplete=True)
+    assert "_incomplete_" in os.path.basename(trace_file)
+    assert tracer.dump("camera", incomplete=True) is None
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Lightweight timing spans for screenrecord.py, written in the Chrome trace event
+format so they open in chrome://tracing or https://ui.perfetto.dev.
+Kept free of GUI/ffmpeg dependencies so it can be imported on its own.
+"""
+import json
+import os
+import threading
+import time
+
+class _NullSpan:
+    """Shared no-op context manager returned by Tracer.span() when tracing is off."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, key, value):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    def __init__(self, tracer, name, session, cat, aggregate_only, args):
+        self.tracer = tracer
+        self.name = name
+        self.session = session
+        self.cat = cat
+        self.aggregate_only = aggregate_only
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add_complete(self.name, self.session, self.start, end, self.cat, self.args,
+                                 aggregate_only=self.aggregate_only)
+        return False
+
+    def set(self, key, value):
+        self.args[key] = value
+
+class Tracer:
+    """
+    Collects timing spans per session ("recording", "camera") and writes them as
+    a trace file when the session is dumped.
+    Spans are only kept for sessions started with begin(); while disabled, span()
+    returns a shared no-op context manager and nothing is recorded.
+    """
+    MAX_EVENTS_PER_NAME = 10000  # Cap on stored events per span name; summary stats keep counting past it
+
+    def __init__(self, enabled=False, output_dir=None):
+        self.enabled = enabled
+        self.output_dir = output_dir
+        self.sessions = {}
+        self.dump_count = 0
+        self.pid = os.getpid()
+
+    def now(self):
+        return time.perf_counter()
+
+    def begin(self, session):
+        """Starts (or restarts) collecting spans for the given session."""
+        if not self.enabled:
+            return
+        self.sessions[session] = {"events": [], "stats": {}, "stored": {}, "dropped": 0}
+
+    def stats(self, session):
+        """Returns the session's summary stats as name -> (count, total_ms, max_ms)."""
+        state = self.sessions.get(session)
+        return dict(state["stats"]) if state else {}
+
+    def span(self, name, session, cat="recorder", aggregate_only=False, **args):
+        """
+        Returns a context manager timing a span in the given session.
+        With aggregate_only, the span only counts towards the summary table and
+        is not written as a trace event (for hot per-frame work).
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, session, cat, aggregate_only, args)
+
+    def _record(self, state, name, start, end, aggregate_only):
+        """Updates summary stats; returns True if the event itself should be stored."""
+        dur_ms = (end - start) * 1000.0
+        count, total, longest = state["stats"].get(name, (0, 0.0, 0.0))
+        state["stats"][name] = (count + 1, total + dur_ms, max(longest, dur_ms))
+        if aggregate_only:
+            return False
+        stored = state["stored"].get(name, 0)
+        if stored >= self.MAX_EVENTS_PER_NAME:
+            state["dropped"] += 1
+            return False
+        state["stored"][name] = stored + 1
+        return True
+
+    def add_complete(self, name, session, start, end, cat="recorder", args=None, aggregate_only=False):
+        """
+        Records a finished span given perf_counter() start and end times.
+        Complete events must nest strictly with other spans on the calling thread.
+        """
+        if not self.enabled:
+            return
+        state = self.sessions.get(session)
+        if state is None or not self._record(state, name, start, end, aggregate_only):
+            return
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": start * 1e6,           # Trace timestamps are in microseconds
+            "dur": (end - start) * 1e6,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        state["events"].append(event)
+
+    def add_async(self, name, session, start, end, span_id, cat="recorder", args=None):
+        """
+        Records a span on its own async track (begin/end events sharing an id), for
+        lifetimes such as a subprocess that overlap the calling thread's spans.
+        """
+        if not self.enabled:
+            return
+        state = self.sessions.get(session)
+        if state is None or not self._record(state, name, start, end, False):
+            return
+        begin = {"name": name, "cat": cat, "ph": "b", "id": span_id,
+                 "ts": start * 1e6, "pid": self.pid, "tid": threading.get_ident()}
+        if args:
+            begin["args"] = args
+        end_event = {"name": name, "cat": cat, "ph": "e", "id": span_id,
+                     "ts": end * 1e6, "pid": self.pid, "tid": threading.get_ident()}
+        state["events"].extend([begin, end_event])
+
+    def dump(self, session, incomplete=False):
+        """
+        Ends the given session, writes its spans to a trace file and prints a
+        per-phase summary. Pass incomplete=True when the session was cut short
+        (e.g. the app quit mid-recording). Returns the trace file path, or None
+        if nothing was written.
+        """
+        state = self.sessions.pop(session, None)
+        if not self.enabled or state is None or not state["stats"]:
+            return None
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": self.pid,
+             "args": {"name": "screenrecorder", "session": session, "incomplete": incomplete}},
+        ]
+        for thread in threading.enumerate():
+            metadata.append({"name": "thread_name", "ph": "M", "pid": self.pid,
+                             "tid": thread.ident, "args": {"name": thread.name}})
+        output_dir = self.output_dir or os.getcwd()
+        os.makedirs(output_dir, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+        self.dump_count += 1
+        label = f"{session}_incomplete" if incomplete else session
+        trace_file = os.path.join(output_dir, f"trace_{label}_{stamp}_{self.dump_count}.json")
+        try:
+            with open(trace_file, "w") as f:
+                json.dump({"traceEvents": metadata + state["events"], "displayTimeUnit": "ms"}, f)
+        except OSError as e:
+            print("Error writing trace file:", e)
+            return None
+        print(f"Trace written to {trace_file}" + (" (session incomplete)" if incomplete else ""))
+        if state["dropped"]:
+            print(f"Trace event limit reached; {state['dropped']} events were left out of the file.")
+        print(self.summary(state["stats"]))
+        return trace_file
+
+    @staticmethod
+    def summary(stats):
+        """
+        Returns a text table of count/total/mean/max milliseconds per span name,
+        given a session's stats mapping of name -> (count, total_ms, max_ms).
+        """
+        width = max([len("Phase")] + [len(name) for name in stats])
+        lines = [f"{'Phase':<{width}}  {'Count':>6}  {'Total ms':>10}  {'Mean ms':>9}  {'Max ms':>9}"]
+        lines.append("-" * len(lines[0]))
+        for name, (count, total, longest) in sorted(stats.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<{width}}  {count:>6}  {total:>10.2f}  {total/count:>9.2f}  {longest:>9.2f}")
+        return "\n".join(lines)